@@ -2,20 +2,56 @@
 """
 Generate Mermaid Sequence Diagram from Session Trace
 
-This script reads a session trace JSON file and generates a Mermaid sequence diagram
+This script reads a session trace file and generates a Mermaid sequence diagram
 showing the interaction flow between User, Host App, LLM, and Memory System.
 
 Usage:
-    python scripts/generate_sequence_diagram.py <session_trace_file.json>
+    python scripts/generate_sequence_diagram.py <session_trace_file.jsonl>
+    python scripts/generate_sequence_diagram.py --stream <large_session_trace.jsonl>
+    python scripts/generate_sequence_diagram.py <session_trace_file.jsonl.gz>
 
 The diagram is saved to ./diagrams/ directory with a name based on the session ID.
+
+Traces are read in the JSON Lines format written by SessionTrace; older single
+document .json traces are still accepted. If orjson is installed it is used to
+parse the trace file. The --stream mode reads events one at a time instead of
+loading the whole file, which for .json traces requires ijson.
+Trace files ending in .gz are decompressed transparently, as are .zst files when
+zstandard is installed.
 """
 
+import io
+import gzip
 import json
 import argparse
+import functools
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, Any, Iterator, TextIO, BinaryIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+    JSON_ERRORS = (json.JSONDecodeError, ijson.JSONError)
+except ImportError:
+    ijson = None
+    JSON_ERRORS = (json.JSONDecodeError,)
+
+# Failures reading a trace: I/O errors, truncated or corrupt compressed data
+READ_ERRORS = (OSError, EOFError)
+
+try:
+    import zstandard
+    READ_ERRORS += (zstandard.ZstdError,)
+except ImportError:
+    zstandard = None
+
+# Top-level trace fields shown in the diagram header
+HEADER_FIELDS = ('session_id', 'start_time', 'model')
 
 
 def escape_text(text: str, max_length: int = 50) -> str:
@@ -29,6 +65,10 @@ def escape_text(text: str, max_length: int = 50) -> str:
     Returns:
         Escaped and truncated text
     """
+    # Every character escapes to at least one character, so the first
+    # max_length + 1 characters decide both the kept text and whether to truncate
+    text = text[:max_length + 1]
+
     # Replace newlines and quotes
     text = text.replace('\n', '<br/>')
     text = text.replace('"', "'")
@@ -40,116 +80,324 @@ def escape_text(text: str, max_length: int = 50) -> str:
     return text
 
 
-def generate_mermaid_diagram(trace_data: Dict[str, Any]) -> str:
+def open_trace(trace_path: Path) -> BinaryIO:
     """
-    Generate a Mermaid sequence diagram from session trace data.
+    Open a session trace file for binary reading, decompressing by suffix.
 
     Args:
-        trace_data: Parsed session trace JSON
+        trace_path: Path to a trace file, optionally ending in .gz or .zst
 
     Returns:
-        Mermaid diagram as a string
+        Binary file object yielding the decompressed trace
+
+    Raises:
+        RuntimeError: If the file is zstd-compressed and zstandard is not installed
+    """
+    suffix = trace_path.suffix.lower()
+    if suffix == '.gz':
+        return gzip.open(trace_path, 'rb')
+    if suffix == '.zst':
+        if zstandard is None:
+            raise RuntimeError("Reading .zst traces requires zstandard (pip install zstandard)")
+        # The zstd reader cannot be iterated line by line, which .jsonl traces need
+        return io.BufferedReader(zstandard.open(trace_path, 'rb'))
+    return open(trace_path, 'rb')
+
+
+def is_jsonl_trace(trace_path: Path) -> bool:
+    """Return True if the trace file is in JSON Lines format, judging by its suffixes."""
+    return '.jsonl' in (suffix.lower() for suffix in trace_path.suffixes)
+
+
+def _parse_json(data: bytes) -> Any:
+    """Parse a JSON document, using orjson when available."""
+    if orjson is not None:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _read_jsonl_records(trace_path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield the header, event, and footer records of a JSON Lines trace in order."""
+    with open_trace(trace_path) as f:
+        for line in f:
+            if line.strip():
+                yield _parse_json(line)
+
+
+def load_trace(trace_path: Path) -> Dict[str, Any]:
     """
-    lines = [
-        "# Session Sequence Diagram",
-        "",
-        f"**Session ID:** {trace_data.get('session_id', 'unknown')}  ",
-        f"**Start Time:** {trace_data.get('start_time', 'unknown')}  ",
-        f"**Model:** {trace_data.get('model', 'unknown')}  ",
-        "",
-        "```mermaid",
-        "sequenceDiagram",
-        "    participant User",
-        "    participant HostApp as Host App<br/>(chat.py)",
-        "    participant LLM as Claude LLM",
-        "    participant MemorySystem as Memory System<br/>(memory_tool)",
-        "",
-        "    Note over HostApp: Session Started",
-    ]
-
-    events = trace_data.get('events', [])
-    turn_number = 0
-    in_turn = False
-
-    for i, event in enumerate(events):
-        event_type = event.get('event_type')
-
-        if event_type == 'user_input':
-            # Start a new conversation turn
-            turn_number += 1
-            content = escape_text(event.get('content', ''))
-
-            lines.append("")
-            lines.append(f"    rect rgb(200, 220, 255)")
-            lines.append(f"        Note over User,MemorySystem: Turn {turn_number}: User Input")
-            lines.append("")
-            lines.append(f'        User->>HostApp: "{content}"')
-            lines.append("        HostApp->>HostApp: Append to messages")
-            in_turn = True
-
-        elif event_type == 'llm_request':
-            if in_turn:
-                lines.append("")
-                lines.append(f"        HostApp->>LLM: POST /messages<br/>tools: {event.get('tools', [])}")
-
-        elif event_type == 'tool_call':
-            tool_name = event.get('tool_name', '')
-            command = event.get('command', '')
-            parameters = event.get('parameters', {})
-
-            if tool_name == 'memory':
-                # Format parameters for display
-                params_str = ', '.join([f"{k}={repr(v)[:30]}" for k, v in parameters.items()])
-                if len(params_str) > 50:
-                    params_str = params_str[:50] + "..."
-
-                lines.append("")
-                lines.append(f"        Note over LLM: Decides to {command}")
-                lines.append(f"        LLM->>MemorySystem: {command}({params_str})")
-                lines.append("        activate MemorySystem")
-
-        elif event_type == 'tool_result':
-            tool_name = event.get('tool_name', '')
-            command = event.get('command', '')
-            success = event.get('success', True)
-            error = event.get('error')
-            result = event.get('result', '')
-
-            if tool_name == 'memory':
-                if success:
-                    result_preview = escape_text(result, 40)
-                    lines.append(f'        MemorySystem-->>LLM: {result_preview}')
-                else:
-                    error_msg = escape_text(error or 'Error', 40)
-                    lines.append(f'        MemorySystem-->>LLM: ERROR: {error_msg}')
-                lines.append("        deactivate MemorySystem")
-
-        elif event_type == 'llm_response':
-            content = escape_text(event.get('content', ''), 60)
-
-            lines.append("")
-            lines.append("        Note over LLM: Ready to respond")
-            lines.append(f'        LLM-->>HostApp: "{content}"')
-            lines.append("        HostApp->>HostApp: Append to messages")
-            lines.append(f'        HostApp-->>User: "{content}"')
-
-            if in_turn:
-                lines.append("    end")
-                in_turn = False
-
-        elif event_type == 'error':
-            error_msg = escape_text(event.get('message', 'Unknown error'), 40)
-            lines.append(f"    Note over HostApp: ERROR: {error_msg}")
+    Load a session trace file, using orjson when available.
+
+    Args:
+        trace_path: Path to the session trace file
+
+    Returns:
+        Parsed session trace
+
+    Raises:
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    if is_jsonl_trace(trace_path):
+        trace_data: Dict[str, Any] = {}
+        events = []
+        for record in _read_jsonl_records(trace_path):
+            if 'event_type' in record:
+                events.append(record)
+            else:
+                # Header or footer: metadata for the whole session
+                record.pop('type', None)
+                trace_data.update(record)
+        trace_data['events'] = events
+        return trace_data
+
+    with open_trace(trace_path) as f:
+        return _parse_json(f.read())
+
+
+def stream_trace(trace_path: Path) -> Dict[str, Any]:
+    """
+    Read a session trace incrementally.
+
+    Only the header fields are read up front; events are yielded lazily so the
+    full event list is never held in memory. Single document .json traces are
+    parsed with ijson.
+
+    Args:
+        trace_path: Path to the session trace file
+
+    Returns:
+        Trace header fields plus an 'events' iterator
+    """
+    trace_data: Dict[str, Any] = {}
+
+    if is_jsonl_trace(trace_path):
+        # The header is always the first line
+        records = _read_jsonl_records(trace_path)
+        header = next(records, {})
+        records.close()
+        trace_data.update((field, header[field]) for field in HEADER_FIELDS if field in header)
+        trace_data['events'] = _stream_jsonl_events(trace_path)
+        return trace_data
+
+    # Header fields are written before the events array, so stop once it starts
+    with open_trace(trace_path) as f:
+        for prefix, event, value in ijson.parse(f):
+            if prefix == 'events' and event == 'start_array':
+                break
+            if prefix in HEADER_FIELDS and event == 'string':
+                trace_data[prefix] = value
+
+    trace_data['events'] = _stream_events(trace_path)
+    return trace_data
+
+
+def _stream_events(trace_path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield events from a session trace file one at a time."""
+    with open_trace(trace_path) as f:
+        yield from ijson.items(f, 'events.item', use_float=True)
+
+
+def _stream_jsonl_events(trace_path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield events from a JSON Lines session trace one at a time."""
+    for record in _read_jsonl_records(trace_path):
+        if 'event_type' in record:
+            yield record
+
+
+def format_parameters(parameters: Dict[str, Any], max_length: int = 50) -> str:
+    """
+    Format tool call parameters for display in the diagram.
+
+    Args:
+        parameters: Tool call parameters from the trace
+        max_length: Maximum length before truncation
+
+    Returns:
+        Comma-separated key=value string, truncated if too long
+    """
+    # Include each value's type: True, 1 and 1.0 compare and hash equal,
+    # so a key of bare values would return whichever was formatted first
+    items = tuple((k, type(v), v) for k, v in parameters.items())
+    try:
+        return _format_parameter_items(items, max_length)
+    except TypeError:
+        # Unhashable values (e.g. a view_range list) bypass the cache
+        return _format_parameter_items.__wrapped__(items, max_length)
+
+
+@functools.lru_cache(maxsize=1024)
+def _format_parameter_items(items: tuple, max_length: int) -> str:
+    """Cached worker for format_parameters, keyed on (name, type, value) items."""
+    params_str = ', '.join([f"{k}={repr(v)[:30]}" for k, _, v in items])
+    if len(params_str) > max_length:
+        params_str = params_str[:max_length] + "..."
+    return params_str
+
+
+class DiagramState:
+    """Conversation turn state carried across events while emitting a diagram."""
+
+    __slots__ = ('turn_number', 'in_turn')
+
+    def __init__(self):
+        self.turn_number = 0
+        self.in_turn = False
+
+
+def _emit_user_input(buf: TextIO, event: Dict[str, Any], state: DiagramState) -> None:
+    """Start a new conversation turn."""
+    state.turn_number += 1
+    content = escape_text(event['content'])
+
+    buf.write(
+        "\n"
+        "    rect rgb(200, 220, 255)\n"
+        f"        Note over User,MemorySystem: Turn {state.turn_number}: User Input\n"
+        "\n"
+        f'        User->>HostApp: "{content}"\n'
+        "        HostApp->>HostApp: Append to messages\n"
+    )
+    state.in_turn = True
+
+
+def _emit_llm_request(buf: TextIO, event: Dict[str, Any], state: DiagramState) -> None:
+    """Show the host app sending the conversation to the LLM."""
+    if state.in_turn:
+        buf.write(f"\n        HostApp->>LLM: POST /messages<br/>tools: {event['tools']}\n")
+
+
+def _emit_tool_call(buf: TextIO, event: Dict[str, Any], state: DiagramState) -> None:
+    """Show the LLM deciding to call the memory tool."""
+    if event['tool_name'] != 'memory':
+        return
+
+    command = event['command']
+    params_str = format_parameters(event['parameters'])
+
+    buf.write(
+        "\n"
+        f"        Note over LLM: Decides to {command}\n"
+        f"        LLM->>MemorySystem: {command}({params_str})\n"
+        "        activate MemorySystem\n"
+    )
+
+
+def _emit_tool_result(buf: TextIO, event: Dict[str, Any], state: DiagramState) -> None:
+    """Show the memory tool returning its result to the LLM."""
+    if event['tool_name'] != 'memory':
+        return
+
+    if event['success']:
+        result_preview = escape_text(event['result'], 40)
+    else:
+        # 'error' is only recorded when the tool call failed with a message
+        result_preview = "ERROR: " + escape_text(event.get('error') or 'Error', 40)
+
+    buf.write(
+        f'        MemorySystem-->>LLM: {result_preview}\n'
+        "        deactivate MemorySystem\n"
+    )
+
+
+def _emit_llm_response(buf: TextIO, event: Dict[str, Any], state: DiagramState) -> None:
+    """Show the response travelling back to the user and close the turn."""
+    content = escape_text(event['content'], 60)
+
+    buf.write(
+        "\n"
+        "        Note over LLM: Ready to respond\n"
+        f'        LLM-->>HostApp: "{content}"\n'
+        "        HostApp->>HostApp: Append to messages\n"
+        f'        HostApp-->>User: "{content}"\n'
+    )
+
+    if state.in_turn:
+        buf.write("    end\n")
+        state.in_turn = False
+
+
+def _emit_error(buf: TextIO, event: Dict[str, Any], state: DiagramState) -> None:
+    """Annotate an error recorded by the host app."""
+    error_msg = escape_text(event['message'], 40)
+    buf.write(f"    Note over HostApp: ERROR: {error_msg}\n")
+
+
+# Handlers index the fields SessionTrace always records for each event type
+# directly. Event types without a handler (e.g. token_usage) are not drawn
+_EVENT_HANDLERS = {
+    'user_input': _emit_user_input,
+    'llm_request': _emit_llm_request,
+    'tool_call': _emit_tool_call,
+    'tool_result': _emit_tool_result,
+    'llm_response': _emit_llm_response,
+    'error': _emit_error,
+}
+
+
+def write_mermaid_diagram(trace_data: Dict[str, Any], buf: TextIO) -> None:
+    """
+    Write a Mermaid sequence diagram for session trace data to a text stream.
+
+    Each event is written as it is processed, so the diagram is never held in
+    memory as a whole.
+
+    Args:
+        trace_data: Parsed session trace JSON
+        buf: Text stream to write the diagram to
+    """
+    write = buf.write
+
+    write(
+        "# Session Sequence Diagram\n"
+        "\n"
+        f"**Session ID:** {trace_data.get('session_id', 'unknown')}  \n"
+        f"**Start Time:** {trace_data.get('start_time', 'unknown')}  \n"
+        f"**Model:** {trace_data.get('model', 'unknown')}  \n"
+        "\n"
+        "```mermaid\n"
+        "sequenceDiagram\n"
+        "    participant User\n"
+        "    participant HostApp as Host App<br/>(chat.py)\n"
+        "    participant LLM as Claude LLM\n"
+        "    participant MemorySystem as Memory System<br/>(memory_tool)\n"
+        "\n"
+        "    Note over HostApp: Session Started\n"
+    )
+
+    state = DiagramState()
+    get_handler = _EVENT_HANDLERS.get
+
+    for event in trace_data.get('events', []):
+        handler = get_handler(event.get('event_type'))
+        if handler:
+            handler(buf, event, state)
 
     # Close any open turn
-    if in_turn:
-        lines.append("    end")
+    if state.in_turn:
+        write("    end\n")
+
+    # No trailing newline after the closing fence
+    write(
+        "\n"
+        "    Note over HostApp: Session Ended\n"
+        "```"
+    )
 
-    lines.append("")
-    lines.append("    Note over HostApp: Session Ended")
-    lines.append("```")
 
-    return '\n'.join(lines)
+def generate_mermaid_diagram(trace_data: Dict[str, Any]) -> str:
+    """
+    Generate a Mermaid sequence diagram from session trace data.
+
+    Args:
+        trace_data: Parsed session trace JSON
+
+    Returns:
+        Mermaid diagram as a string
+    """
+    buf = io.StringIO()
+    write_mermaid_diagram(trace_data, buf)
+    return buf.getvalue()
 
 
 def main():
@@ -159,30 +407,42 @@ def main():
     )
     parser.add_argument(
         'trace_file',
-        help='Path to session trace JSON file'
+        type=Path,
+        help='Path to session trace .jsonl or .json file (optionally .gz or .zst compressed)'
     )
     parser.add_argument(
         '-o', '--output',
         help='Output file path (default: ./diagrams/sequence_<session_id>.md)'
     )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Stream events from the trace file instead of loading it whole (requires ijson for .json traces)'
+    )
 
     args = parser.parse_args()
 
     # Read the trace file
-    trace_path = Path(args.trace_file)
+    trace_path = args.trace_file
     if not trace_path.exists():
         print(f"Error: Trace file not found: {trace_path}")
         return 1
 
+    if args.stream and ijson is None and not is_jsonl_trace(trace_path):
+        print("Error: --stream requires ijson for .json traces (pip install ijson)")
+        return 1
+
     try:
-        with open(trace_path, 'r', encoding='utf-8') as f:
-            trace_data = json.load(f)
-    except json.JSONDecodeError as e:
+        trace_data = stream_trace(trace_path) if args.stream else load_trace(trace_path)
+    except JSON_ERRORS as e:
         print(f"Error: Invalid JSON in trace file: {e}")
         return 1
-
-    # Generate the diagram
-    diagram = generate_mermaid_diagram(trace_data)
+    except READ_ERRORS as e:
+        print(f"Error: Could not read trace file: {e}")
+        return 1
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
 
     # Determine output path
     if args.output:
@@ -197,9 +457,24 @@ def main():
     # Ensure output directory exists
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Write the diagram
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(diagram)
+    # Write the diagram directly to the output file
+    try:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            write_mermaid_diagram(trace_data, f)
+    except JSON_ERRORS as e:
+        # Streamed events are parsed lazily, so decode errors can surface mid-write
+        output_path.unlink(missing_ok=True)
+        print(f"Error: Invalid JSON in trace file: {e}")
+        return 1
+    except READ_ERRORS as e:
+        output_path.unlink(missing_ok=True)
+        print(f"Error: Could not read trace file: {e}")
+        return 1
+    except KeyError as e:
+        # Event handlers index the fields each event type must have
+        output_path.unlink(missing_ok=True)
+        print(f"Error: Malformed event in trace file: missing field {e}")
+        return 1
 
     # Output the path (this is what the user sees)
     print(f"Sequence diagram saved to: {output_path}")
@@ -10,6 +10,7 @@ Article: https://alteredcraft.com/p/the-memory-illusion-teaching-your
 
 import os
 import sys
+import atexit
 import logging
 from pathlib import Path
 from datetime import datetime
@@ -17,16 +18,26 @@ from dotenv import load_dotenv
 from anthropic import Anthropic
 from anthropic.types.beta import BetaMemoryTool20250818ViewCommand
 
-from memory_tool import LocalFilesystemMemoryTool
-from session_trace import SessionTrace
+from memory_tool import LocalFilesystemMemoryTool, STORAGE_MODES
+from session_trace import SessionTrace, EVENT_TYPES
+
+try:
+    import readline
+except ImportError:
+    # Not available on Windows; input() still works without line editing
+    readline = None
 
 
 # Load environment variables
 load_dotenv()
 
 
-def setup_logging(app_log_level: str = "INFO", dependencies_log_level: str = "WARNING", log_file: str|None = None) -> None:
-    """Configure logging based on log levels and optional file output.
+# Application loggers whose level follows APP_LOG_LEVEL and the /debug toggle
+APP_LOGGERS = ['src', '__main__', 'memory_tool']
+
+
+def init_logging(app_log_level: str = "INFO", dependencies_log_level: str = "WARNING", log_file: str|None = None) -> None:
+    """Configure logging handlers once at startup, with optional file output.
 
     Args:
         app_log_level: Log level for application loggers (src.*, __main__, memory_tool)
@@ -34,7 +45,6 @@ def setup_logging(app_log_level: str = "INFO", dependencies_log_level: str = "WA
         log_file: Optional file path for logging output
     """
     # Convert string levels to logging constants
-    app_level = getattr(logging, app_log_level.upper(), logging.INFO)
     dep_level = getattr(logging, dependencies_log_level.upper(), logging.WARNING)
 
     # Configure root logger
@@ -67,12 +77,41 @@ def setup_logging(app_log_level: str = "INFO", dependencies_log_level: str = "WA
     for handler in handlers:
         root_logger.addHandler(handler)
 
-    # Set our application loggers to the requested level
     # All other loggers inherit dep_level from root
-    for logger_name in ['src', '__main__', 'memory_tool']:
+    set_log_level(app_log_level)
+
+
+def set_log_level(app_log_level: str) -> None:
+    """Set the level of the application loggers without touching handlers.
+
+    Args:
+        app_log_level: Log level for application loggers (src.*, __main__, memory_tool)
+    """
+    app_level = getattr(logging, app_log_level.upper(), logging.INFO)
+    for logger_name in APP_LOGGERS:
         logging.getLogger(logger_name).setLevel(app_level)
 
 
+def setup_readline(history_file: Path = Path.home() / ".memory_system_history") -> None:
+    """Enable line editing and persistent input history for the chat prompt.
+
+    Args:
+        history_file: File used to load and save input history across sessions
+    """
+    if readline is None:
+        return
+
+    readline.parse_and_bind("tab: complete")
+    readline.set_history_length(1000)
+    try:
+        readline.read_history_file(history_file)
+    except OSError:
+        # No history yet (first run) or unreadable file
+        pass
+
+    atexit.register(readline.write_history_file, history_file)
+
+
 def select_system_prompt(prompts_dir: str = "prompts") -> str:
     """Display available system prompts and let user select one.
 
@@ -192,7 +231,7 @@ def conversation_loop():
     app_log_level = os.getenv("APP_LOG_LEVEL", "INFO")
     dependencies_log_level = os.getenv("DEPENDENCIES_LOG_LEVEL", "WARNING")
     log_file = os.getenv("LOG_TO_FILE")
-    setup_logging(app_log_level, dependencies_log_level, log_file)
+    init_logging(app_log_level, dependencies_log_level, log_file)
     logger = logging.getLogger(__name__)
 
     # Get model from environment with default to Sonnet 4.5
@@ -202,9 +241,26 @@ def conversation_loop():
         print("Create a .env file with: ANTHROPIC_MODEL=your_desired_model_here")
         sys.exit(1)
 
+    # Memories persist on disk unless an ephemeral in-memory store is requested
+    storage_mode = os.getenv("MEMORY_STORAGE", "").strip() or "disk"
+    if storage_mode not in STORAGE_MODES:
+        print(f"Error: MEMORY_STORAGE must be one of {', '.join(STORAGE_MODES)}, got: {storage_mode}")
+        sys.exit(1)
+
+    # Record every trace event type unless a comma-separated subset is given
+    trace_events = os.getenv("TRACE_EVENTS", "").strip()
+    trace_event_types = None
+    if trace_events and trace_events != "*":
+        trace_event_types = [name.strip() for name in trace_events.split(",") if name.strip()]
+        unknown = sorted(set(trace_event_types) - EVENT_TYPES)
+        if unknown:
+            print(f"Error: Unknown TRACE_EVENTS types: {', '.join(unknown)}")
+            print(f"Valid types: {', '.join(sorted(EVENT_TYPES))}")
+            sys.exit(1)
+
     # Initialize client and memory tool
     client = Anthropic(api_key=api_key)
-    memory_tool = LocalFilesystemMemoryTool()
+    memory_tool = LocalFilesystemMemoryTool(storage_mode=storage_mode)
 
     # Select and load system prompt
     selected_prompt_file = select_system_prompt()
@@ -212,9 +268,10 @@ def conversation_loop():
     logger.debug(f"Loaded system prompt from {selected_prompt_file}")
 
     # Initialize session trace
-    trace = SessionTrace(model=model, system_prompt=system_prompt)
+    trace = SessionTrace(model=model, system_prompt=system_prompt, event_types=trace_event_types)
     memory_tool.set_trace(trace)
 
+    setup_readline()
     print_welcome()
     logger.info(f"Starting conversation loop with model: {model}")
 
@@ -264,7 +321,7 @@ def conversation_loop():
                     # Start a new trace for the fresh session
                     old_trace_file = trace.finalize()
                     print(f"Previous session trace: {old_trace_file}")
-                    trace = SessionTrace(model=model, system_prompt=system_prompt)
+                    trace = SessionTrace(model=model, system_prompt=system_prompt, event_types=trace_event_types)
                     memory_tool.set_trace(trace)
                 continue
 
@@ -276,7 +333,7 @@ def conversation_loop():
                 else:
                     current_app_log_level = "DEBUG"
                     status = "enabled"
-                setup_logging(current_app_log_level, dependencies_log_level, log_file)
+                set_log_level(current_app_log_level)
                 print(f"\nDebug logging {status}\n")
                 continue
 
@@ -305,22 +362,24 @@ def conversation_loop():
 
             # Call Claude with memory tool
             # The magic happens here: tool_runner automatically executes memory operations
-            logger.debug("="*60)
-            logger.debug("SENDING REQUEST TO LLM")
-            logger.debug("="*60)
-            logger.debug(f"Model: {model}")
-            logger.debug(f"Messages ({len(messages)} total):")
-            for idx, msg in enumerate(messages):
-                role = msg['role']
-                content = msg['content']
-                # Truncate very long messages for readability
-                if isinstance(content, str):
-                    if len(content) > 500:
-                        content_preview = content[:500] + f"... ({len(content)} chars total)"
-                    else:
-                        content_preview = content
-                    logger.debug(f"  [{idx+1}] {role}: {content_preview}")
-            logger.debug("="*60)
+            # Skip building the request dump (a walk over all messages) unless DEBUG is on
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("="*60)
+                logger.debug("SENDING REQUEST TO LLM")
+                logger.debug("="*60)
+                logger.debug(f"Model: {model}")
+                logger.debug(f"Messages ({len(messages)} total):")
+                for idx, msg in enumerate(messages):
+                    role = msg['role']
+                    content = msg['content']
+                    # Truncate very long messages for readability
+                    if isinstance(content, str):
+                        if len(content) > 500:
+                            content_preview = content[:500] + f"... ({len(content)} chars total)"
+                        else:
+                            content_preview = content
+                        logger.debug(f"  [{idx+1}] {role}: {content_preview}")
+                logger.debug("="*60)
 
             # Log LLM request to trace
             trace.log_llm_request(messages_count=len(messages), tools=["memory"])
@@ -337,12 +396,11 @@ def conversation_loop():
             # Consume the runner stream to get the final message
             response = runner.until_done()
 
-            # Extract response text
-            response_text = ""
-            for block in response.content:
-                if hasattr(block, 'text'):
-                    response_text = block.text
-                    break
+            # Extract the first text block of the response
+            response_text = next(
+                (block.text for block in response.content if getattr(block, 'text', None) is not None),
+                ""
+            )
 
             # Display response
             print(f"\nClaude: {response_text}\n")
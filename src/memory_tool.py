@@ -9,14 +9,22 @@ For production use with security considerations, see:
 https://docs.claude.com/en/docs/agents-and-tools/tool-use/memory-tool
 """
 
+import os
+import mmap
+import errno
+import stat
 import logging
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, Dict, List, Tuple, Union
 import shutil
+import tempfile
+from uuid import uuid4
 from typing_extensions import override
 
 from anthropic.lib.tools import BetaAbstractMemoryTool
 from anthropic.types.beta import (
+    BetaMemoryTool20250818Command,
     BetaMemoryTool20250818ViewCommand,
     BetaMemoryTool20250818CreateCommand,
     BetaMemoryTool20250818DeleteCommand,
@@ -28,6 +36,34 @@ from anthropic.types.beta import (
 
 logger = logging.getLogger(__name__)
 
+# Content cache limits: number of files kept, and largest file worth caching
+CONTENT_CACHE_MAX_ENTRIES = 128
+CONTENT_CACHE_MAX_FILE_SIZE = 1024 * 1024
+
+# Number of validated paths remembered per tool instance
+PATH_CACHE_MAX_ENTRIES = 256
+
+# str_replace memory-maps files larger than this instead of reading them in
+MMAP_MIN_FILE_SIZE = 1024 * 1024
+
+# Writes at least this large reserve their blocks up front in one allocation
+PREALLOCATE_MIN_SIZE = 1024 * 1024
+
+# Line lookups far into a file skip ahead by counting newlines in blocks this size
+LINE_SKIP_BLOCK_SIZE = 64 * 1024
+
+# Page cache hints are only available on some platforms (not macOS or Windows)
+HAS_FADVISE = hasattr(os, 'posix_fadvise')
+
+# os.link() errors meaning the filesystem has no hard links
+LINK_UNSUPPORTED_ERRNOS = frozenset({errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.ENOSYS})
+
+# Supported values for the storage_mode argument
+STORAGE_MODES = ("disk", "memory")
+
+# RAM-backed filesystem used for ephemeral stores when the platform has one
+EPHEMERAL_STORAGE_DIR = "/dev/shm"
+
 
 class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
     """
@@ -37,19 +73,47 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
     Claude autonomously decides when to create, read, update, or delete memories.
     """
 
-    def __init__(self, base_path: str = "./memory"):
+    # Virtual directory that every memory path must live under
+    _PREFIX = "/memories"
+    _PREFIX_LEN = len(_PREFIX)
+
+    def __init__(self, base_path: str = "./memory", storage_mode: str = "disk"):
         """
         Initialize the memory tool with a storage directory.
 
         Args:
             base_path: Base directory for storing memory files
+            storage_mode: "disk" to persist memories under base_path, or "memory"
+                for a throwaway store that is discarded when the tool goes away
+                (useful for tests and short-lived runs)
+
+        Raises:
+            ValueError: If storage_mode is not one of STORAGE_MODES
         """
         super().__init__()
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"storage_mode must be one of {STORAGE_MODES}, got: {storage_mode}")
+        self.storage_mode = storage_mode
+        self._ephemeral_dir: Optional[tempfile.TemporaryDirectory] = None
+        if storage_mode == "memory":
+            # A temporary directory on tmpfs never reaches the disk, and every
+            # command keeps using the same code path as the persistent store.
+            # It is removed when the tool is garbage collected or at exit
+            ram_dir = EPHEMERAL_STORAGE_DIR if os.path.isdir(EPHEMERAL_STORAGE_DIR) else None
+            self._ephemeral_dir = tempfile.TemporaryDirectory(prefix="memory_", dir=ram_dir)
+            base_path = self._ephemeral_dir.name
         self.base_path = Path(base_path)
         self.memory_root = self.base_path / "memories"
         self.memory_root.mkdir(exist_ok=True, parents=True)
+        # The root never moves, so resolve it once rather than on every command
+        self._memory_root_resolved = self.memory_root.resolve()
+        self._memory_root_str = str(self._memory_root_resolved)
         self.trace = None  # Optional session trace
-        logger.info(f"[MEMORY] Initialized with root: {self.memory_root.absolute()}")
+        # /memories path string -> validated path, least recently used first
+        self._path_cache: OrderedDict[str, Path] = OrderedDict()
+        # path -> (st_mtime_ns, st_size, raw bytes), least recently used first
+        self._content_cache: OrderedDict[Path, Tuple[int, int, bytes]] = OrderedDict()
+        logger.info("[MEMORY] Initialized with root: %s (storage: %s)", self.memory_root.absolute(), storage_mode)
 
     def set_trace(self, trace) -> None:
         """
@@ -59,7 +123,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
             trace: SessionTrace instance
         """
         self.trace = trace
-        logger.debug(f"[MEMORY] Session trace connected")
+        logger.debug("[MEMORY] Session trace connected")
 
     def _validate_path(self, path: str) -> Path:
         """
@@ -73,25 +137,509 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
             path: Path within /memories (e.g., "/memories/user_profile.txt")
 
         Returns:
-            Resolved absolute path
+            Normalized absolute path under the resolved memory root
 
         Raises:
             ValueError: If path attempts to escape memory directory
         """
-        if not path.startswith("/memories"):
+        # Agents keep touching the same few files, so remember validated paths.
+        # Rejected paths are not cached and fail again on every call
+        cached = self._path_cache.get(path)
+        if cached is not None:
+            self._path_cache.move_to_end(path)
+            return cached
+
+        full_path = self._normalize_path(path)
+
+        self._path_cache[path] = full_path
+        if len(self._path_cache) > PATH_CACHE_MAX_ENTRIES:
+            self._path_cache.popitem(last=False)
+        return full_path
+
+    def _normalize_path(self, path: str) -> Path:
+        """
+        Map a /memories path to a filesystem path, rejecting any that escape the root.
+
+        Args:
+            path: Path within /memories (e.g., "/memories/user_profile.txt")
+
+        Returns:
+            Normalized absolute path under the resolved memory root
+
+        Raises:
+            ValueError: If path attempts to escape memory directory
+        """
+        if not path.startswith(self._PREFIX):
             raise ValueError(f"Path must start with /memories, got: {path}")
 
         # Remove /memories prefix
-        relative_path = path[len("/memories"):].lstrip("/")
-        full_path = self.memory_root / relative_path if relative_path else self.memory_root
+        relative_path = path[self._PREFIX_LEN:].lstrip("/")
+
+        # Normalize lexically against the resolved root; this catches ".." escapes
+        # without touching the filesystem
+        root = self._memory_root_str
+        normalized = os.path.normpath(os.path.join(root, relative_path))
+        if normalized != root and not normalized.startswith(root + os.sep):
+            raise ValueError(f"Path {path} would escape /memories directory")
+
+        # A symlink below the root could still point outside it. Only the
+        # components under the root need checking, and only a symlink triggers
+        # the full resolve()
+        probe = root
+        for part in normalized[len(root):].split(os.sep):
+            if not part:
+                continue
+            probe = os.path.join(probe, part)
+            try:
+                is_link = stat.S_ISLNK(os.lstat(probe).st_mode)
+            except OSError:
+                # Nothing exists from here down, so there are no more links
+                break
+            if is_link:
+                resolved = Path(normalized).resolve()
+                try:
+                    resolved.relative_to(self._memory_root_resolved)
+                except ValueError as e:
+                    raise ValueError(f"Path {path} would escape /memories directory") from e
+                # The resolved target is only for the containment check; the
+                # caller gets the path it named, so delete and rename act on
+                # the link itself rather than its target
+                break
 
-        # Validate path stays within memory directory
+        return Path(normalized)
+
+    def _stat_or_none(self, full_path: Path) -> Optional[os.stat_result]:
+        """
+        Stat a path once, so callers can test existence and type from one syscall.
+
+        Args:
+            full_path: Validated path to check
+
+        Returns:
+            The stat result, or None if nothing exists at the path
+        """
         try:
-            full_path.resolve().relative_to(self.memory_root.resolve())
-        except ValueError as e:
-            raise ValueError(f"Path {path} would escape /memories directory") from e
+            return os.stat(full_path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
 
-        return full_path
+    def _read_cached(self, full_path: Path) -> bytes:
+        """
+        Read a memory file's raw bytes, reusing cached content if the file is unchanged.
+
+        The cache entry is validated against the file's mtime and size, so edits
+        made outside this tool are still picked up. Content is kept as UTF-8 bytes;
+        only view() needs to decode it.
+
+        Args:
+            full_path: Validated path to an existing memory file
+
+        Returns:
+            File contents as bytes
+        """
+        fd = os.open(full_path, os.O_RDONLY)
+        try:
+            file_stat = os.fstat(fd)
+            cached = self._content_cache.get(full_path)
+            if cached and cached[0] == file_stat.st_mtime_ns and cached[1] == file_stat.st_size:
+                self._content_cache.move_to_end(full_path)
+                logger.debug("[MEMORY] Content cache hit: %s", full_path.name)
+                return cached[2]
+
+            # The whole file is read front to back, so ask for aggressive readahead
+            if HAS_FADVISE:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+            # Ask for one byte more than the file holds. A single read may still
+            # return less than requested (Linux caps one read at about 2 GiB), so
+            # keep reading until the fstat() size is reached or EOF comes early.
+            # Ending at exactly that size is the common single-read case; getting
+            # the extra byte means the file grew, so read on to EOF
+            request_size = file_stat.st_size + 1
+            content = os.read(fd, request_size)
+            if len(content) < file_stat.st_size:
+                chunks = [content]
+                total = len(content)
+                while total < file_stat.st_size and (chunk := os.read(fd, request_size - total)):
+                    chunks.append(chunk)
+                    total += len(chunk)
+                content = b''.join(chunks)
+            if len(content) == request_size:
+                chunks = [content]
+                while chunk := os.read(fd, 65536):
+                    chunks.append(chunk)
+                content = b''.join(chunks)
+        finally:
+            os.close(fd)
+
+        content = self._normalize_newlines(content)
+
+        if file_stat.st_size <= CONTENT_CACHE_MAX_FILE_SIZE:
+            self._content_cache[full_path] = (file_stat.st_mtime_ns, file_stat.st_size, content)
+            self._content_cache.move_to_end(full_path)
+            if len(self._content_cache) > CONTENT_CACHE_MAX_ENTRIES:
+                self._content_cache.popitem(last=False)
+
+        return content
+
+    @staticmethod
+    def _normalize_newlines(content: bytes) -> bytes:
+        """
+        Translate CRLF and lone CR line endings to LF, as universal newlines mode does.
+
+        Files were once read with read_text(), which did this on read, so old_str
+        matching, line ranges and rewrites all see LF-only text.
+
+        Args:
+            content: Raw file content
+
+        Returns:
+            Content with LF line endings only
+        """
+        # A CR byte only ever encodes CR in UTF-8, so byte-level replacement is safe
+        if b'\r' not in content:
+            return content
+        return content.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+
+    def _write_file(self, full_path: Path, *chunks: bytes, exclusive: bool = False) -> None:
+        """
+        Atomically write raw bytes to a memory file, replacing any existing content.
+
+        Data is written to a hidden temporary file in the same directory and then
+        renamed over the target, so readers never see a partially written file.
+        A symlinked target is written through: the file it points to is replaced,
+        not the link. The target's permission bits are kept; its owner and any
+        other hard links to it are not.
+
+        Args:
+            full_path: Validated path of the file to write
+            *chunks: UTF-8 encoded file content, written back to back; any
+                buffer (e.g. a memoryview slice) is accepted, avoiding a join
+            exclusive: Fail instead of replacing if the target already exists
+
+        Raises:
+            FileExistsError: If exclusive is set and the target already exists
+            ValueError: If a symlinked target now resolves outside the memory root
+        """
+        # _normalize_path keeps symlinks unresolved, so that delete and rename act
+        # on the link itself; rewrites must replace the file it points to
+        target_path = full_path if exclusive else Path(os.path.realpath(full_path))
+        if target_path != full_path and not target_path.is_relative_to(self._memory_root_resolved):
+            # The link may have been repointed since the path was validated and cached
+            raise ValueError(f"Symlink {full_path.name} points outside /memories directory")
+
+        # Dot-prefixed so an interrupted write never shows up in view() listings
+        tmp_path = target_path.with_name(f".{target_path.name}.{uuid4().hex[:8]}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            try:
+                if not exclusive:
+                    # The rename replaces the inode, so carry the permissions of
+                    # the file being replaced over to the new one
+                    try:
+                        existing_mode = stat.S_IMODE(os.stat(target_path).st_mode)
+                    except FileNotFoundError:
+                        pass
+                    else:
+                        os.fchmod(fd, existing_mode)
+                self._write_chunks(fd, chunks)
+            finally:
+                os.close(fd)
+            if exclusive:
+                # link() fails if the target exists, giving O_EXCL semantics
+                # without exposing a partially written file
+                try:
+                    os.link(tmp_path, full_path)
+                except OSError as e:
+                    if e.errno not in LINK_UNSUPPORTED_ERRNOS:
+                        raise
+                    # No hard links on this filesystem (e.g. FAT, some SMB or
+                    # FUSE mounts): create the target directly instead
+                    self._write_new_file(full_path, chunks)
+                tmp_path.unlink()
+            else:
+                os.replace(tmp_path, target_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        self._invalidate_cache(full_path)
+        if target_path != full_path:
+            self._invalidate_cache(target_path)
+
+    @staticmethod
+    def _write_chunks(fd: int, chunks: Tuple[bytes, ...]) -> None:
+        """
+        Write buffers to a newly created file descriptor, back to back.
+
+        Args:
+            fd: Descriptor of an empty file opened for writing
+            chunks: UTF-8 encoded file content
+        """
+        total_size = sum(memoryview(chunk).nbytes for chunk in chunks)
+        if total_size >= PREALLOCATE_MIN_SIZE and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(fd, 0, total_size)
+            except OSError:
+                # Not supported by every filesystem; the write still works
+                pass
+        for chunk in chunks:
+            # os.write may write less than requested, so loop until done. Views are
+            # released on the way out, even on error, so a caller's mmap can close
+            with memoryview(chunk) as view:
+                offset = 0
+                while offset < view.nbytes:
+                    with view[offset:] as remaining:
+                        offset += os.write(fd, remaining)
+
+    def _write_new_file(self, full_path: Path, chunks: Tuple[bytes, ...]) -> None:
+        """
+        Create a file exclusively and write to it in place.
+
+        Unlike _write_file, a reader may briefly see the file partially written;
+        this is only the fallback where hard links are unavailable.
+
+        Args:
+            full_path: Validated path of the file to create
+            chunks: UTF-8 encoded file content
+
+        Raises:
+            FileExistsError: If the target already exists
+        """
+        fd = os.open(full_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            try:
+                self._write_chunks(fd, chunks)
+            finally:
+                os.close(fd)
+        except BaseException:
+            # The file was created above, so a failed write must not leave it behind
+            full_path.unlink(missing_ok=True)
+            raise
+
+    def _skip_lines(self, content: bytes, offset: int, count: int) -> int:
+        """
+        Find the byte offset a given number of lines past a line start, without splitting.
+
+        Args:
+            content: File content as UTF-8 bytes
+            offset: Offset of a line's first byte
+            count: Number of lines to skip
+
+        Returns:
+            Offset of the first byte of the line reached, len(content) for the
+            position just past the last line, or -1 if the file has fewer lines
+        """
+        # Far targets: skip whole blocks holding fewer newlines than remain,
+        # counted in C, halving the block once it would overshoot
+        end = len(content)
+        block = LINE_SKIP_BLOCK_SIZE
+        while count > 16 and offset < end:
+            block_end = min(offset + block, end)
+            newlines = content.count(b'\n', offset, block_end)
+            if newlines >= count:
+                block //= 2
+                continue
+            count -= newlines
+            if block_end == end:
+                # Stop just past the last newline, leaving a final line with no
+                # trailing newline to the loop below
+                if newlines:
+                    offset = content.rfind(b'\n', offset, end) + 1
+                break
+            offset = block_end
+
+        for _ in range(count):
+            newline = content.find(b'\n', offset)
+            if newline >= 0:
+                offset = newline + 1
+            elif offset < end:
+                # Skip past a final line with no trailing newline
+                offset = end
+            else:
+                return -1
+        return offset
+
+    def _count_lines(self, content: bytes) -> int:
+        """Count lines in file content, including a final line with no trailing newline."""
+        line_count = content.count(b'\n')
+        if content and not content.endswith(b'\n'):
+            line_count += 1
+        return line_count
+
+    def _slice_lines(self, content: bytes, view_range: List[int]) -> bytes:
+        """
+        Extract a 1-indexed, inclusive range of lines from file content.
+
+        Only the requested span is copied; an end of -1 means end of file.
+
+        Args:
+            content: File content as UTF-8 bytes
+            view_range: [start_line, end_line]
+
+        Returns:
+            The selected lines, without a trailing line terminator
+        """
+        start_index = max(1, view_range[0]) - 1
+        start = self._skip_lines(content, 0, start_index)
+        if start < 0:
+            # Past-the-end ranges are empty, as list slicing made them
+            return b''
+
+        end_line = view_range[1]
+        if end_line < -1:
+            # Other negative ends count back from the last line, as list slicing did
+            end_line = max(self._count_lines(content) + end_line, 0)
+        if end_line == -1:
+            end = len(content)
+        elif end_line <= start_index:
+            return b''
+        else:
+            # Walk on from the start line rather than from the top of the file
+            end = self._skip_lines(content, start, end_line - start_index)
+            if end < 0:
+                # Past-the-end positions clamp to the end of the file
+                end = len(content)
+        if end <= start:
+            return b''
+
+        selected = content[start:end]
+        if selected.endswith(b'\n'):
+            return selected[:-1]
+        return selected
+
+    def _replace_in_content(self, content: bytes, command: BetaMemoryTool20250818StrReplaceCommand) -> bytes:
+        """
+        Apply a str_replace command to file content.
+
+        Args:
+            content: Current file content as UTF-8 bytes
+            command: StrReplace command with path, old_str, and new_str
+
+        Returns:
+            Updated file content
+
+        Raises:
+            RuntimeError: If old_str is missing or not unique
+        """
+        start, end = self._find_unique(content, command)
+        return content[:start] + command.new_str.encode('utf-8') + content[end:]
+
+    def _find_unique(self, content: Union[bytes, mmap.mmap], command: BetaMemoryTool20250818StrReplaceCommand) -> Tuple[int, int]:
+        """
+        Locate the single occurrence of a str_replace command's old_str.
+
+        Args:
+            content: File content as bytes or a read-only mmap of the file
+            command: StrReplace command with path and old_str
+
+        Returns:
+            Start and end byte offsets of the match
+
+        Raises:
+            RuntimeError: If old_str is missing or not unique
+        """
+        # Search on UTF-8 bytes; the encoding is self-synchronizing, so a byte
+        # match is always a match on character boundaries
+        old_bytes = command.old_str.encode('utf-8')
+
+        # Verify old_str appears exactly once; the second search starts after
+        # the first match, so a unique string is scanned past only once
+        start = content.find(old_bytes)
+        if start < 0:
+            raise RuntimeError(f"String not found in {command.path}")
+        end = start + len(old_bytes)
+        if content.find(old_bytes, end) >= 0:
+            # Error path only: mmap has no count(), so this copies a mapped file
+            count = bytes(content).count(old_bytes)
+            raise RuntimeError(f"String appears {count} times in {command.path}. Must be unique.")
+
+        return start, end
+
+    def _replace_in_mapped_file(self, full_path: Path, command: BetaMemoryTool20250818StrReplaceCommand) -> None:
+        """
+        Apply a str_replace command to a large file without reading it into memory.
+
+        The file is memory-mapped for the search, and the unchanged parts are
+        written straight from the mapping to the replacement file. A file with
+        CR line endings is read in and normalized instead, like any other read.
+
+        Args:
+            full_path: Validated path to an existing memory file
+            command: StrReplace command with path, old_str, and new_str
+        """
+        with open(full_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped.find(b'\r') >= 0:
+                # Line endings must be translated first, which a read-only
+                # mapping cannot do, so take the in-memory path
+                content = self._normalize_newlines(mapped[:])
+                self._write_file(full_path, self._replace_in_content(content, command))
+                return
+            start, end = self._find_unique(mapped, command)
+            # The mapping cannot be closed while a view of it is still exported, and
+            # a failed write's traceback keeps the slices alive, so release them all
+            with memoryview(mapped) as view, view[:start] as head, view[end:] as tail:
+                self._write_file(full_path, head, command.new_str.encode('utf-8'), tail)
+
+    def _insert_into_content(self, content: bytes, command: BetaMemoryTool20250818InsertCommand) -> bytes:
+        """
+        Apply an insert command to file content.
+
+        Args:
+            content: Current file content as UTF-8 bytes
+            command: Insert command with path, insert_line, and insert_text
+
+        Returns:
+            Updated file content
+
+        Raises:
+            RuntimeError: If insert_line is out of range
+        """
+        # Convert 1-indexed to 0-indexed
+        insert_idx = command.insert_line - 1
+
+        offset = self._skip_lines(content, 0, insert_idx) if insert_idx >= 0 else -1
+        if offset < 0:
+            raise RuntimeError(
+                f"Line {command.insert_line} is out of range (file has {self._count_lines(content)} lines)"
+            )
+
+        # Ensure insert_text ends with newline
+        insert_bytes = command.insert_text.encode('utf-8')
+        if not insert_bytes.endswith(b'\n'):
+            insert_bytes += b'\n'
+
+        return content[:offset] + insert_bytes + content[offset:]
+
+    def _invalidate_path_cache(self, full_path: Path) -> None:
+        """
+        Forget validated paths at or beneath a deleted or moved path.
+
+        A cached result can depend on a symlink that has since been replaced,
+        so it must be validated again.
+
+        Args:
+            full_path: Validated path of a deleted or moved file or directory
+        """
+        stale = [
+            path for path, cached_path in self._path_cache.items()
+            if cached_path == full_path or full_path in cached_path.parents
+        ]
+        for path in stale:
+            del self._path_cache[path]
+
+    def _invalidate_cache(self, full_path: Path) -> None:
+        """
+        Drop cached content for a path and anything beneath it.
+
+        Args:
+            full_path: Validated path of a modified, moved, or deleted file or directory
+        """
+        stale = [
+            cached_path for cached_path in self._content_cache
+            if cached_path == full_path or full_path in cached_path.parents
+        ]
+        for cached_path in stale:
+            del self._content_cache[cached_path]
 
     @override
     def view(self, command: BetaMemoryTool20250818ViewCommand) -> str:
@@ -104,7 +652,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
         Returns:
             File contents or directory listing
         """
-        logger.debug(f"[MEMORY] view() called: path={command.path}, view_range={command.view_range}")
+        logger.debug("[MEMORY] view() called: path=%s, view_range=%s", command.path, command.view_range)
 
         # Log tool call to trace
         if self.trace:
@@ -117,43 +665,47 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
         try:
             full_path = self._validate_path(command.path)
 
+            # One stat() decides between directory listing, file read, and missing
+            path_stat = self._stat_or_none(full_path)
+
             # Directory listing
-            if full_path.is_dir():
-                items: List[str] = []
+            if path_stat is not None and stat.S_ISDIR(path_stat.st_mode):
                 try:
-                    for item in sorted(full_path.iterdir()):
-                        if item.name.startswith("."):
-                            continue
-                        items.append(f"{item.name}/" if item.is_dir() else item.name)
+                    # DirEntry.is_dir() uses the d_type from the directory read,
+                    # so regular entries need no extra stat() call
+                    with os.scandir(full_path) as it:
+                        entries = [(entry.name, entry.is_dir()) for entry in it if not entry.name.startswith(".")]
+                    entries.sort()
+                    items: List[str] = [f"{name}/" if is_dir else name for name, is_dir in entries]
                     result = f"Directory: {command.path}\n" + "\n".join([f"- {item}" for item in items])
-                    logger.debug(f"[MEMORY] Listed directory: {command.path} - Found {len(items)} items")
+                    logger.debug("[MEMORY] Listed directory: %s - Found %s items", command.path, len(items))
                     return result
                 except Exception as e:
                     raise RuntimeError(f"Cannot read directory {command.path}: {e}") from e
 
             # File reading
-            if not full_path.is_file():
+            if path_stat is None or not stat.S_ISREG(path_stat.st_mode):
                 raise RuntimeError(f"Path {command.path} does not exist")
 
-            content = full_path.read_text(encoding='utf-8')
-            lines = content.splitlines()
+            content = self._read_cached(full_path)
 
             # Apply line range if specified
             view_range = command.view_range
             if view_range:
-                start_line = max(1, view_range[0]) - 1
-                end_line = len(lines) if view_range[1] == -1 else view_range[1]
-                lines = lines[start_line:end_line]
-
-            result = '\n'.join(lines)
+                result = self._slice_lines(content, view_range).decode('utf-8')
+            else:
+                # Whole file is returned as stored, including any trailing newline
+                result = content.decode('utf-8')
 
             # Log content that was loaded
-            logger.debug(f"[MEMORY] Loaded file: {command.path}")
-            logger.debug(f"[MEMORY]   Lines: {len(lines)} | Characters: {len(result)}")
-            if len(result) <= 200:
-                logger.debug(f"[MEMORY]   Content: {result}")
-            else:
-                logger.debug(f"[MEMORY]   Content preview: {result[:200]}... (truncated)")
+            if logger.isEnabledFor(logging.DEBUG):
+                line_count = result.count('\n') + 1 if result else 0
+                logger.debug("[MEMORY] Loaded file: %s", command.path)
+                logger.debug("[MEMORY]   Lines: %s | Characters: %s", line_count, len(result))
+                if len(result) <= 200:
+                    logger.debug("[MEMORY]   Content: %s", result)
+                else:
+                    logger.debug("[MEMORY]   Content preview: %s... (truncated)", result[:200])
 
             # Log tool result to trace
             if self.trace:
@@ -167,7 +719,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
             return result
 
         except (ValueError, RuntimeError) as e:
-            logger.warning(f"[MEMORY] Error in view: {e}")
+            logger.warning("[MEMORY] Error in view: %s", e)
             # Log error to trace
             if self.trace:
                 self.trace.log_tool_result(
@@ -179,7 +731,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
                 )
             raise
         except Exception as e:
-            logger.error(f"[MEMORY] Unexpected error viewing {command.path}: {e}")
+            logger.error("[MEMORY] Unexpected error viewing %s: %s", command.path, e)
             # Log error to trace
             if self.trace:
                 self.trace.log_tool_result(
@@ -202,7 +754,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
         Returns:
             Success message
         """
-        logger.debug(f"[MEMORY] create() called: path={command.path}")
+        logger.debug("[MEMORY] create() called: path=%s", command.path)
 
         # Log tool call to trace
         if self.trace:
@@ -215,25 +767,28 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
         try:
             full_path = self._validate_path(command.path)
 
-            if full_path.exists():
-                raise RuntimeError(f"File already exists: {command.path}. Use str_replace or insert to modify.")
-
             # Create parent directories if needed
             full_path.parent.mkdir(parents=True, exist_ok=True)
 
-            full_path.write_text(command.file_text, encoding='utf-8')
+            # Existence is checked by the write itself, so there is no window in
+            # which another writer can create the file between check and write
+            try:
+                self._write_file(full_path, command.file_text.encode('utf-8'), exclusive=True)
+            except FileExistsError:
+                raise RuntimeError(f"File already exists: {command.path}. Use str_replace or insert to modify.") from None
 
             # Log the new file creation with content
-            lines = command.file_text.splitlines()
-            logger.debug(f"[MEMORY] Created new file: {command.path}")
-            logger.debug(f"[MEMORY]   Lines: {len(lines)} | Characters: {len(command.file_text)}")
-            if len(command.file_text) <= 200:
-                logger.debug(f"[MEMORY]   Content: {command.file_text}")
-            else:
-                logger.debug(f"[MEMORY]   Content preview: {command.file_text[:200]}... (truncated)")
+            if logger.isEnabledFor(logging.DEBUG):
+                lines = command.file_text.splitlines()
+                logger.debug("[MEMORY] Created new file: %s", command.path)
+                logger.debug("[MEMORY]   Lines: %s | Characters: %s", len(lines), len(command.file_text))
+                if len(command.file_text) <= 200:
+                    logger.debug("[MEMORY]   Content: %s", command.file_text)
+                else:
+                    logger.debug("[MEMORY]   Content preview: %s... (truncated)", command.file_text[:200])
 
             result_msg = f"Successfully created {command.path}"
-            logger.info(f"[MEMORY] ✓ Created memory file: {command.path}")
+            logger.info("[MEMORY] ✓ Created memory file: %s", command.path)
 
             # Log tool result to trace
             if self.trace:
@@ -247,7 +802,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
             return result_msg
 
         except (ValueError, RuntimeError) as e:
-            logger.warning(f"[MEMORY] Error in create: {e}")
+            logger.warning("[MEMORY] Error in create: %s", e)
             # Log error to trace
             if self.trace:
                 self.trace.log_tool_result(
@@ -259,7 +814,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
                 )
             raise
         except Exception as e:
-            logger.error(f"[MEMORY] Unexpected error creating {command.path}: {e}")
+            logger.error("[MEMORY] Unexpected error creating %s: %s", command.path, e)
             # Log error to trace
             if self.trace:
                 self.trace.log_tool_result(
@@ -282,7 +837,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
         Returns:
             Success message
         """
-        logger.debug(f"[MEMORY] str_replace() called: path={command.path}")
+        logger.debug("[MEMORY] str_replace() called: path=%s", command.path)
 
         # Log tool call to trace
         if self.trace:
@@ -299,29 +854,25 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
         try:
             full_path = self._validate_path(command.path)
 
-            if not full_path.is_file():
+            path_stat = self._stat_or_none(full_path)
+            if path_stat is None or not stat.S_ISREG(path_stat.st_mode):
                 raise RuntimeError(f"File not found: {command.path}")
 
-            content = full_path.read_text(encoding='utf-8')
-
-            # Verify old_str appears exactly once
-            count = content.count(command.old_str)
-            if count == 0:
-                raise RuntimeError(f"String not found in {command.path}")
-            elif count > 1:
-                raise RuntimeError(f"String appears {count} times in {command.path}. Must be unique.")
-
-            new_content = content.replace(command.old_str, command.new_str)
-            full_path.write_text(new_content, encoding='utf-8')
+            if path_stat.st_size > MMAP_MIN_FILE_SIZE:
+                self._replace_in_mapped_file(full_path, command)
+            else:
+                content = self._read_cached(full_path)
+                self._write_file(full_path, self._replace_in_content(content, command))
 
             # Log what was changed
-            old_preview = command.old_str if len(command.old_str) <= 100 else command.old_str[:100] + "..."
-            new_preview = command.new_str if len(command.new_str) <= 100 else command.new_str[:100] + "..."
-            logger.debug(f"[MEMORY] Updated file: {command.path}")
-            logger.debug(f"[MEMORY]   Old text: {old_preview}")
-            logger.debug(f"[MEMORY]   New text: {new_preview}")
+            if logger.isEnabledFor(logging.DEBUG):
+                old_preview = command.old_str if len(command.old_str) <= 100 else command.old_str[:100] + "..."
+                new_preview = command.new_str if len(command.new_str) <= 100 else command.new_str[:100] + "..."
+                logger.debug("[MEMORY] Updated file: %s", command.path)
+                logger.debug("[MEMORY]   Old text: %s", old_preview)
+                logger.debug("[MEMORY]   New text: %s", new_preview)
             result_msg = f"Successfully replaced string in {command.path}"
-            logger.info(f"[MEMORY] ✓ Replaced string in {command.path}")
+            logger.info("[MEMORY] ✓ Replaced string in %s", command.path)
 
             # Log tool result to trace
             if self.trace:
@@ -335,7 +886,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
             return result_msg
 
         except (ValueError, RuntimeError) as e:
-            logger.warning(f"[MEMORY] Error in str_replace: {e}")
+            logger.warning("[MEMORY] Error in str_replace: %s", e)
             # Log error to trace
             if self.trace:
                 self.trace.log_tool_result(
@@ -347,7 +898,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
                 )
             raise
         except Exception as e:
-            logger.error(f"[MEMORY] Unexpected error in str_replace {command.path}: {e}")
+            logger.error("[MEMORY] Unexpected error in str_replace %s: %s", command.path, e)
             # Log error to trace
             if self.trace:
                 self.trace.log_tool_result(
@@ -365,12 +916,12 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
         Insert text at a specific line number.
 
         Args:
-            command: Insert command with path, line, and insert_line
+            command: Insert command with path, insert_line, and insert_text
 
         Returns:
             Success message
         """
-        logger.debug(f"[MEMORY] insert() called: path={command.path}, line={command.line}")
+        logger.debug("[MEMORY] insert() called: path=%s, line=%s", command.path, command.insert_line)
 
         # Log tool call to trace
         if self.trace:
@@ -379,40 +930,28 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
                 command="insert",
                 parameters={
                     "path": command.path,
-                    "line": command.line,
-                    "insert_length": len(command.insert_line)
+                    "line": command.insert_line,
+                    "insert_length": len(command.insert_text)
                 }
             )
 
         try:
             full_path = self._validate_path(command.path)
 
-            if not full_path.is_file():
+            path_stat = self._stat_or_none(full_path)
+            if path_stat is None or not stat.S_ISREG(path_stat.st_mode):
                 raise RuntimeError(f"File not found: {command.path}")
 
-            content = full_path.read_text(encoding='utf-8')
-            lines = content.splitlines(keepends=True)
-
-            # Convert 1-indexed to 0-indexed
-            insert_idx = command.line - 1
-
-            if insert_idx < 0 or insert_idx > len(lines):
-                raise RuntimeError(f"Line {command.line} is out of range (file has {len(lines)} lines)")
-
-            # Ensure insert_line ends with newline
-            insert_text = command.insert_line
-            if not insert_text.endswith('\n'):
-                insert_text += '\n'
-
-            lines.insert(insert_idx, insert_text)
-            full_path.write_text(''.join(lines), encoding='utf-8')
+            content = self._read_cached(full_path)
+            self._write_file(full_path, self._insert_into_content(content, command))
 
             # Log what was inserted
-            insert_preview = command.insert_line if len(command.insert_line) <= 100 else command.insert_line[:100] + "..."
-            logger.debug(f"[MEMORY] Updated file: {command.path}")
-            logger.debug(f"[MEMORY]   Inserted at line {command.line}: {insert_preview}")
+            if logger.isEnabledFor(logging.DEBUG):
+                insert_preview = command.insert_text if len(command.insert_text) <= 100 else command.insert_text[:100] + "..."
+                logger.debug("[MEMORY] Updated file: %s", command.path)
+                logger.debug("[MEMORY]   Inserted at line %s: %s", command.insert_line, insert_preview)
             result_msg = f"Successfully inserted line in {command.path}"
-            logger.info(f"[MEMORY] ✓ Inserted line at position {command.line} in {command.path}")
+            logger.info("[MEMORY] ✓ Inserted line at position %s in %s", command.insert_line, command.path)
 
             # Log tool result to trace
             if self.trace:
@@ -426,7 +965,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
             return result_msg
 
         except (ValueError, RuntimeError) as e:
-            logger.warning(f"[MEMORY] Error in insert: {e}")
+            logger.warning("[MEMORY] Error in insert: %s", e)
             # Log error to trace
             if self.trace:
                 self.trace.log_tool_result(
@@ -438,7 +977,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
                 )
             raise
         except Exception as e:
-            logger.error(f"[MEMORY] Unexpected error inserting line in {command.path}: {e}")
+            logger.error("[MEMORY] Unexpected error inserting line in %s: %s", command.path, e)
             # Log error to trace
             if self.trace:
                 self.trace.log_tool_result(
@@ -461,7 +1000,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
         Returns:
             Success message
         """
-        logger.debug(f"[MEMORY] delete() called: path={command.path}")
+        logger.debug("[MEMORY] delete() called: path=%s", command.path)
 
         # Log tool call to trace
         if self.trace:
@@ -474,19 +1013,23 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
         try:
             full_path = self._validate_path(command.path)
 
-            if not full_path.exists():
+            path_stat = self._stat_or_none(full_path)
+            if path_stat is None:
                 raise RuntimeError(f"Path not found: {command.path}")
 
-            if full_path.is_dir():
+            self._invalidate_cache(full_path)
+            self._invalidate_path_cache(full_path)
+
+            if stat.S_ISDIR(path_stat.st_mode):
                 shutil.rmtree(full_path)
                 result_msg = f"Successfully deleted directory {command.path}"
-                logger.debug(f"[MEMORY] Deleted directory: {command.path}")
-                logger.info(f"[MEMORY] ✓ Deleted directory: {command.path}")
+                logger.debug("[MEMORY] Deleted directory: %s", command.path)
+                logger.info("[MEMORY] ✓ Deleted directory: %s", command.path)
             else:
                 full_path.unlink()
                 result_msg = f"Successfully deleted {command.path}"
-                logger.debug(f"[MEMORY] Deleted file: {command.path}")
-                logger.info(f"[MEMORY] ✓ Deleted file: {command.path}")
+                logger.debug("[MEMORY] Deleted file: %s", command.path)
+                logger.info("[MEMORY] ✓ Deleted file: %s", command.path)
 
             # Log tool result to trace
             if self.trace:
@@ -500,7 +1043,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
             return result_msg
 
         except (ValueError, RuntimeError) as e:
-            logger.warning(f"[MEMORY] Error in delete: {e}")
+            logger.warning("[MEMORY] Error in delete: %s", e)
             # Log error to trace
             if self.trace:
                 self.trace.log_tool_result(
@@ -512,7 +1055,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
                 )
             raise
         except Exception as e:
-            logger.error(f"[MEMORY] Unexpected error deleting {command.path}: {e}")
+            logger.error("[MEMORY] Unexpected error deleting %s: %s", command.path, e)
             # Log error to trace
             if self.trace:
                 self.trace.log_tool_result(
@@ -535,7 +1078,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
         Returns:
             Success message
         """
-        logger.debug(f"[MEMORY] rename() called: old_path={command.old_path}, new_path={command.new_path}")
+        logger.debug("[MEMORY] rename() called: old_path=%s, new_path=%s", command.old_path, command.new_path)
 
         # Log tool call to trace
         if self.trace:
@@ -552,20 +1095,24 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
             full_old_path = self._validate_path(command.old_path)
             full_new_path = self._validate_path(command.new_path)
 
-            if not full_old_path.exists():
+            if self._stat_or_none(full_old_path) is None:
                 raise RuntimeError(f"File not found: {command.old_path}")
 
-            if full_new_path.exists():
+            if self._stat_or_none(full_new_path) is not None:
                 raise RuntimeError(f"Destination already exists: {command.new_path}")
 
             # Create parent directories if needed
             full_new_path.parent.mkdir(parents=True, exist_ok=True)
 
             full_old_path.rename(full_new_path)
+            self._invalidate_cache(full_old_path)
+            self._invalidate_cache(full_new_path)
+            self._invalidate_path_cache(full_old_path)
+            self._invalidate_path_cache(full_new_path)
 
             result_msg = f"Successfully renamed {command.old_path} to {command.new_path}"
-            logger.debug(f"[MEMORY] Renamed/moved: {command.old_path} → {command.new_path}")
-            logger.info(f"[MEMORY] ✓ Renamed {command.old_path} to {command.new_path}")
+            logger.debug("[MEMORY] Renamed/moved: %s → %s", command.old_path, command.new_path)
+            logger.info("[MEMORY] ✓ Renamed %s to %s", command.old_path, command.new_path)
 
             # Log tool result to trace
             if self.trace:
@@ -579,7 +1126,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
             return result_msg
 
         except (ValueError, RuntimeError) as e:
-            logger.warning(f"[MEMORY] Error in rename: {e}")
+            logger.warning("[MEMORY] Error in rename: %s", e)
             # Log error to trace
             if self.trace:
                 self.trace.log_tool_result(
@@ -591,7 +1138,7 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
                 )
             raise
         except Exception as e:
-            logger.error(f"[MEMORY] Unexpected error renaming {command.old_path}: {e}")
+            logger.error("[MEMORY] Unexpected error renaming %s: %s", command.old_path, e)
             # Log error to trace
             if self.trace:
                 self.trace.log_tool_result(
@@ -603,6 +1150,108 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
                 )
             raise RuntimeError(f"Error renaming {command.old_path}: {e}") from e
 
+    def batch_apply(self, commands: List[BetaMemoryTool20250818Command]) -> List[str]:
+        """
+        Apply several memory commands in order, reading and writing each edited file once.
+
+        str_replace and insert commands are applied to an in-memory copy of the
+        file and written together. Any other command first writes out pending
+        edits and then runs as usual, so the outcome matches running the commands
+        one at a time: if a command fails, the edits before it are written and
+        its error is raised.
+
+        Args:
+            commands: Memory commands to apply
+
+        Returns:
+            Result message for each command, in order
+        """
+        logger.debug("[MEMORY] batch_apply() called: %s commands", len(commands))
+
+        # Log tool call to trace
+        if self.trace:
+            self.trace.log_tool_call(
+                tool_name="memory",
+                command="batch_apply",
+                parameters={"commands": [command.command for command in commands]}
+            )
+
+        results: List[str] = []
+        # Edited content not yet written; validated paths are normalized, so
+        # different spellings of the same file share one entry
+        pending: Dict[Path, bytes] = {}
+
+        def flush() -> None:
+            for full_path, content in pending.items():
+                self._write_file(full_path, content)
+            pending.clear()
+
+        try:
+            try:
+                for command in commands:
+                    if command.command not in ("str_replace", "insert"):
+                        flush()
+                        results.append(self.execute(command))
+                        continue
+
+                    full_path = self._validate_path(command.path)
+                    if full_path in pending:
+                        content = pending[full_path]
+                    else:
+                        path_stat = self._stat_or_none(full_path)
+                        if path_stat is None or not stat.S_ISREG(path_stat.st_mode):
+                            raise RuntimeError(f"File not found: {command.path}")
+                        content = self._read_cached(full_path)
+
+                    if command.command == "str_replace":
+                        pending[full_path] = self._replace_in_content(content, command)
+                        results.append(f"Successfully replaced string in {command.path}")
+                    else:
+                        pending[full_path] = self._insert_into_content(content, command)
+                        results.append(f"Successfully inserted line in {command.path}")
+            finally:
+                # Edits that succeeded are kept even if a later command failed
+                flush()
+
+            result_msg = f"Successfully applied {len(commands)} commands"
+            logger.info("[MEMORY] ✓ Applied batch of %s commands", len(commands))
+
+            # Log tool result to trace
+            if self.trace:
+                self.trace.log_tool_result(
+                    tool_name="memory",
+                    command="batch_apply",
+                    result=result_msg,
+                    success=True
+                )
+
+            return results
+
+        except (ValueError, RuntimeError) as e:
+            logger.warning("[MEMORY] Error in batch_apply: %s", e)
+            # Log error to trace
+            if self.trace:
+                self.trace.log_tool_result(
+                    tool_name="memory",
+                    command="batch_apply",
+                    result="",
+                    success=False,
+                    error=str(e)
+                )
+            raise
+        except Exception as e:
+            logger.error("[MEMORY] Unexpected error in batch_apply: %s", e)
+            # Log error to trace
+            if self.trace:
+                self.trace.log_tool_result(
+                    tool_name="memory",
+                    command="batch_apply",
+                    result="",
+                    success=False,
+                    error=str(e)
+                )
+            raise RuntimeError(f"Error applying batch: {e}") from e
+
     def clear_all_memory(self) -> str:
         """
         Delete all memory files (useful for debugging/testing).
@@ -616,10 +1265,12 @@ class LocalFilesystemMemoryTool(BetaAbstractMemoryTool):
             if self.memory_root.exists():
                 shutil.rmtree(self.memory_root)
                 self.memory_root.mkdir(exist_ok=True)
+            self._content_cache.clear()
+            self._path_cache.clear()
 
             logger.info("[MEMORY] ✓ All memories cleared")
             return "All memories have been cleared"
 
         except Exception as e:
-            logger.error(f"[MEMORY] Error clearing memories: {e}")
+            logger.error("[MEMORY] Error clearing memories: %s", e)
             return f"Error clearing memories: {str(e)}"
@@ -8,19 +8,303 @@ This module provides a JSON-based trace system that captures:
 - LLM responses
 - Token usage statistics
 
-Each session is stored in a separate timestamped JSON file in the sessions/ directory.
+Each session is stored in a separate timestamped JSON Lines file in the sessions/
+directory: a header line with the session metadata, one line per event, and a
+footer line with the end time once the session is finalized. Events are appended
+as they happen, so recording cost does not grow with the length of the session.
+Use load_trace() to read a trace back as a single dictionary.
 """
 
+import os
+import sys
 import json
+import base64
+import secrets
+import time
+import queue
+import argparse
+import atexit
+import signal
 import logging
+import threading
+from collections import deque
 from pathlib import Path
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-from uuid import uuid4
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 
 logger = logging.getLogger(__name__)
 
+# Buffered events are written out once any of these limits is reached
+FLUSH_MAX_EVENTS = 64
+FLUSH_MAX_BYTES = 64 * 1024
+FLUSH_INTERVAL_SECONDS = 1.0
+
+# Tool results longer than this are truncated in the trace
+TOOL_RESULT_MAX_LENGTH = 1000
+
+# Every event type a SessionTrace can record
+EVENT_TYPES = frozenset({
+    "user_input",
+    "llm_request",
+    "tool_call",
+    "tool_result",
+    "llm_response",
+    "token_usage",
+    "error",
+})
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize datetimes the way orjson does when falling back to the json module."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# Sessions not yet finalized, closed at interpreter exit or on SIGTERM
+_open_traces: set = set()
+_atexit_hook_installed = False
+_sigterm_hook_installed = False
+
+
+def _finalize_open_traces() -> None:
+    """Finalize every session that is still open."""
+    for trace in list(_open_traces):
+        trace.finalize()
+
+
+def _install_exit_hooks() -> None:
+    """
+    Register, at most once per process, the hooks that finalize open sessions on shutdown.
+
+    atexit covers normal interpreter exit, including an unhandled exception.
+    SIGTERM (e.g. from a process supervisor) skips atexit, so a handler is
+    installed for it as well, chaining to any handler already in place; this is
+    only possible when called from the main thread, and is skipped while SIGTERM
+    is ignored.
+    """
+    global _atexit_hook_installed, _sigterm_hook_installed
+    if not _atexit_hook_installed:
+        atexit.register(_finalize_open_traces)
+        _atexit_hook_installed = True
+
+    # Left unset off the main thread, so a later main-thread call still installs it
+    if _sigterm_hook_installed or threading.current_thread() is not threading.main_thread():
+        return
+    previous_handler = signal.getsignal(signal.SIGTERM)
+    if previous_handler == signal.SIG_IGN:
+        # The process survives SIGTERM, so its sessions must stay open; checked
+        # again on the next call in case the disposition changes
+        return
+
+    def handle_sigterm(signum, frame):
+        _finalize_open_traces()
+        if callable(previous_handler):
+            previous_handler(signum, frame)
+        else:
+            # Terminate with the default action, as if no handler were installed
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    _sigterm_hook_installed = True
+
+
+def _format_timestamp(timestamp_ns: int) -> str:
+    """
+    Format an epoch timestamp as local ISO 8601 time with microseconds.
+
+    Args:
+        timestamp_ns: Nanoseconds since the epoch, as from time.time_ns()
+
+    Returns:
+        Timestamp such as "2025-11-09T14:34:20.123456"
+    """
+    seconds, nanoseconds = divmod(timestamp_ns, 1_000_000_000)
+    return f"{datetime.fromtimestamp(seconds).strftime('%Y-%m-%dT%H:%M:%S')}.{nanoseconds // 1000:06d}"
+
+
+def _encode_record(record: Dict[str, Any]) -> bytes:
+    """
+    Serialize a trace record as one compact, newline-terminated JSON line.
+
+    Uses orjson when it is installed, falling back to the json module. Either
+    way datetime values are written as ISO 8601 strings.
+
+    Args:
+        record: Header, event, or footer data
+
+    Returns:
+        UTF-8 encoded JSON line
+
+    Raises:
+        TypeError: If the record contains a value that cannot be serialized
+    """
+    if orjson is not None:
+        # orjson.JSONEncodeError subclasses TypeError
+        return orjson.dumps(record, default=_json_default, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+    return (line + "\n").encode('utf-8')
+
+
+def full_tool_result(event: Dict[str, Any]) -> str:
+    """
+    Return the complete text of a tool_result event.
+
+    Truncated results recorded with full_tool_results enabled carry the whole
+    result zstd-compressed in "result_zstd"; otherwise the stored result is
+    returned as is.
+
+    Args:
+        event: A tool_result event, e.g. from load_trace()
+
+    Returns:
+        The full result if it was recorded, else the (possibly truncated) result
+
+    Raises:
+        RuntimeError: If the event holds a compressed result and zstandard is not installed
+    """
+    compressed = event.get("result_zstd")
+    if compressed is None:
+        return event["result"]
+    if zstandard is None:
+        raise RuntimeError("Reading compressed tool results requires zstandard (pip install zstandard)")
+    return zstandard.ZstdDecompressor().decompress(base64.b64decode(compressed)).decode('utf-8')
+
+
+def load_trace(trace_path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Load a session trace file into a single dictionary.
+
+    Header and footer lines are merged into the top level, and event lines are
+    collected in order under "events", matching the shape of the JSON Schema in
+    docs/session-trace.md.
+
+    Args:
+        trace_path: Path to a session_*.jsonl trace file
+
+    Returns:
+        Session metadata with an "events" list, plus "end_time" and
+        "duration_ns" if finalized
+
+    Raises:
+        json.JSONDecodeError: If a line is not valid JSON
+    """
+    trace: Dict[str, Any] = {}
+    events: List[Dict[str, Any]] = []
+
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    loads = orjson.loads if orjson is not None else json.loads
+
+    with open(trace_path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = loads(line)
+            if "event_type" in record:
+                events.append(record)
+            else:
+                # Header or footer: metadata for the whole session
+                record.pop("type", None)
+                trace.update(record)
+
+    trace["events"] = events
+    return trace
+
+
+def export_trace_json(trace_path: Union[str, Path], output_path: Union[str, Path]) -> None:
+    """
+    Convert a session trace into a single compact JSON document.
+
+    The output has the same shape as load_trace() returns. Event lines are
+    copied byte for byte between the header and footer, so the events are
+    never decoded or encoded again; only the small header and footer are.
+
+    Args:
+        trace_path: Path to a session_*.jsonl trace file
+        output_path: Path of the .json file to write
+
+    Raises:
+        json.JSONDecodeError: If the header or footer line is not valid JSON
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+    footer: Dict[str, Any] = {}
+
+    with open(trace_path, 'rb') as src, open(output_path, 'wb', buffering=1024 * 1024) as dst:
+        event_count = 0
+        for line in src:
+            line = line.strip()
+            if not line:
+                continue
+            # SessionTrace writes the record type first for header and footer
+            # lines and the timestamp first for events
+            if not line.startswith(b'{"type":'):
+                if event_count:
+                    dst.write(b",")
+                dst.write(line)
+                event_count += 1
+                continue
+
+            record = loads(line)
+            if record.pop("type") == "header":
+                # Reopen the header object so the events array follows its fields
+                dst.write(_encode_record(record).rstrip()[:-1])
+                dst.write(b',"events":[' if record else b'"events":[')
+            else:
+                footer.update(record)
+
+        dst.write(b"]")
+        if footer:
+            dst.write(b"," + _encode_record(footer).rstrip()[1:-1])
+        dst.write(b"}\n")
+
+
+class _TraceEvent:
+    """
+    A recorded event waiting to be written.
+
+    A slotted object is lighter than a per-event dict, and the event data is
+    the dict the log_* method already built, so it is never copied.
+
+    A tool result kept in full travels as full_result and is compressed on the
+    writer thread into result_zstd, after which only the compressed copy is kept.
+    """
+
+    __slots__ = ('timestamp_ns', 'event_type', 'data', 'full_result', 'result_zstd')
+
+    def __init__(self, timestamp_ns: int, event_type: str, data: Dict[str, Any], full_result: Optional[str] = None):
+        self.timestamp_ns = timestamp_ns
+        self.event_type = event_type
+        self.data = data
+        self.full_result = full_result
+        self.result_zstd: Optional[str] = None
+
+    def to_record(self, timestamp: str) -> Dict[str, Any]:
+        """
+        Build the JSON record for this event.
+
+        Args:
+            timestamp: Formatted event timestamp
+
+        Returns:
+            Event dict with timestamp and event_type first, then the event data
+        """
+        record = {"timestamp": timestamp, "event_type": self.event_type, **self.data}
+        if self.result_zstd is not None:
+            record["result_zstd"] = self.result_zstd
+        return record
+
 
 class SessionTrace:
     """
@@ -32,7 +316,15 @@ class SessionTrace:
     - Token usage tracking
     """
 
-    def __init__(self, base_path: str = "./sessions", model: str = "", system_prompt: str = ""):
+    def __init__(
+        self,
+        base_path: str = "./sessions",
+        model: str = "",
+        system_prompt: str = "",
+        ring_size: int = 0,
+        full_tool_results: bool = False,
+        event_types: Optional[Iterable[str]] = None
+    ):
         """
         Initialize a new session trace.
 
@@ -40,57 +332,254 @@ class SessionTrace:
             base_path: Directory for storing session trace files
             model: Claude model version being used
             system_prompt: System prompt for this session
+            ring_size: Number of most recent events to also keep in memory for
+                dump_ring() (0 disables the in-memory ring)
+            full_tool_results: Also store truncated tool results in full,
+                zstd-compressed (requires zstandard); see full_tool_result()
+            event_types: Event types to record (default: all of EVENT_TYPES);
+                log_* calls for any other type return immediately
+
+        Raises:
+            RuntimeError: If full_tool_results is set and zstandard is not installed
+            ValueError: If event_types names an unknown event type
         """
+        # Checked by name at the top of every log_* method, so a filtered out
+        # event costs one set lookup and nothing else
+        if event_types is None:
+            self._skipped_types: frozenset = frozenset()
+        else:
+            enabled_types = frozenset(event_types)
+            unknown = enabled_types - EVENT_TYPES
+            if unknown:
+                raise ValueError(f"Unknown trace event types: {', '.join(sorted(unknown))}")
+            self._skipped_types = EVENT_TYPES - enabled_types
+
+        if full_tool_results and zstandard is None:
+            raise RuntimeError("full_tool_results requires zstandard (pip install zstandard)")
+        # Compressor for full tool results, reused across events
+        self._compressor = zstandard.ZstdCompressor(level=3) if full_tool_results else None
+
         self.base_path = Path(base_path)
-        self.base_path.mkdir(exist_ok=True, parents=True)
 
-        # Generate session ID with timestamp and unique suffix
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_id = uuid4().hex[:8]
-        self.session_id = f"{timestamp}_{unique_id}"
+        # Generate session ID with timestamp and unique suffix, both taken from
+        # one clock reading that also gives the start time
+        start_ns = time.time_ns()
+        now = time.localtime(start_ns // 1_000_000_000)
+        timestamp = "%04d%02d%02d_%02d%02d%02d" % (
+            now.tm_year, now.tm_mon, now.tm_mday, now.tm_hour, now.tm_min, now.tm_sec
+        )
+        self.session_id = f"{timestamp}_{secrets.token_hex(4)}"
+
+        # Session length is measured on the monotonic clock, so it stays
+        # correct if the wall clock is adjusted mid-session
+        self._start_monotonic_ns = time.monotonic_ns()
 
-        # Initialize trace structure
+        # Session metadata; events are appended to the file, not kept in memory
         self.trace: Dict[str, Any] = {
             "session_id": self.session_id,
-            "start_time": datetime.now().isoformat(),
+            "start_time": _format_timestamp(start_ns),
             "model": model,
             "system_prompt": system_prompt,
-            "events": []
         }
 
+        # Flight recorder: a fixed-size window of the latest events, so memory
+        # stays bounded however long the session runs
+        self._ring: Optional[deque] = deque(maxlen=ring_size) if ring_size > 0 else None
+
         # Determine trace file path
-        self.trace_file = self.base_path / f"session_{self.session_id}.json"
+        self.trace_file = self.base_path / f"session_{self.session_id}.jsonl"
 
         logger.info(f"[TRACE] Session started: {self.session_id}")
         logger.debug(f"[TRACE] Trace file: {self.trace_file}")
 
-        # Write initial trace file
-        self._save()
+        # Records are batched in memory and written with a single os.write()
+        # per flush, so a raw descriptor is all that is needed. O_APPEND keeps
+        # each write whole even if another process appends to the same file.
+        # Only the writer thread touches the descriptor and the buffer
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        try:
+            self._fd = os.open(self.trace_file, flags, 0o644)
+        except FileNotFoundError:
+            # Only the first session needs the directory created; later ones
+            # skip the mkdir() call entirely
+            self.base_path.mkdir(exist_ok=True, parents=True)
+            self._fd = os.open(self.trace_file, flags, 0o644)
+        # Fixed size and filled in place: clearing a bytearray frees its
+        # memory, so reusing one allocation means tracking the used length
+        self._buffer = bytearray(FLUSH_MAX_BYTES)
+        self._buffer_used = 0
+        self._buffered_events = 0
+        self._last_flush = time.monotonic()
+        # Events arrive in bursts within the same second, so the date and time
+        # part of their timestamps is formatted once per second
+        self._timestamp_second = -1
+        self._timestamp_prefix = ""
+
+        # Callers only enqueue records; encoding and file I/O happen on the
+        # writer thread, off the chat loop's critical path
+        self._finalized = False
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = threading.Thread(
+            target=self._run_writer,
+            name=f"trace-writer-{self.session_id}",
+            daemon=True
+        )
+        self._writer.start()
+
+        # Make sure queued events reach the file even if finalize() is never called
+        _install_exit_hooks()
+        _open_traces.add(self)
+
+        self._queue.put({"type": "header", **self.trace})
+
+    def _run_writer(self) -> None:
+        """
+        Writer thread loop: encode queued records and write them out in batches.
 
-    def _save(self) -> None:
-        """Save the current trace to disk."""
+        Besides records, the queue carries threading.Event flush requests, which
+        are set once everything before them is written, and a final None that
+        stops the thread.
+        """
+        while True:
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL_SECONDS)
+            except queue.Empty:
+                # Nothing new for a while, so write out whatever is pending
+                self._write_buffer()
+                continue
+
+            if item is None:
+                self._write_buffer()
+                return
+            if isinstance(item, threading.Event):
+                self._write_buffer()
+                item.set()
+                continue
+            self._buffer_record(item)
+
+    def _buffer_record(self, record: Union[_TraceEvent, Dict[str, Any]]) -> None:
+        """
+        Buffer one record as a JSON line, writing the batch once a limit is reached.
+
+        Args:
+            record: Event, or header or footer data, to write
+        """
         try:
-            with open(self.trace_file, 'w', encoding='utf-8') as f:
-                json.dump(self.trace, f, indent=2, ensure_ascii=False)
+            if isinstance(record, _TraceEvent):
+                if record.full_result is not None:
+                    self._compress_result(record)
+                record = record.to_record(self._iso_timestamp(record.timestamp_ns))
+            line = _encode_record(record)
         except Exception as e:
-            logger.error(f"[TRACE] Failed to save trace file: {e}")
+            logger.error(f"[TRACE] Failed to serialize trace record: {e}")
+            return
+
+        size = len(line)
+        if self._buffer_used + size > FLUSH_MAX_BYTES:
+            self._write_buffer()
+            if size > FLUSH_MAX_BYTES:
+                # Too big to ever fit, so it bypasses the buffer
+                self._write_all(line)
+                return
+
+        # Same-length slice assignment copies into the existing allocation
+        end = self._buffer_used + size
+        self._buffer[self._buffer_used:end] = line
+        self._buffer_used = end
+        self._buffered_events += 1
+        if (
+            self._buffered_events >= FLUSH_MAX_EVENTS
+            or end == FLUSH_MAX_BYTES
+            or time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS
+        ):
+            self._write_buffer()
+
+    def _compress_result(self, event: _TraceEvent) -> None:
+        """
+        Compress an event's full tool result into result_zstd (writer thread only).
+
+        Args:
+            event: tool_result event carrying full_result
+        """
+        # Text output compresses well; base64 keeps it a JSON string
+        compressed = self._compressor.compress(event.full_result.encode('utf-8'))
+        event.result_zstd = base64.b64encode(compressed).decode('ascii')
+        # The ring may hold this event, so drop the uncompressed copy
+        event.full_result = None
+
+    def _iso_timestamp(self, timestamp_ns: int) -> str:
+        """
+        Format an event timestamp, reusing the prefix for the current second (writer thread only).
+
+        Args:
+            timestamp_ns: Nanoseconds since the epoch, as from time.time_ns()
+
+        Returns:
+            Same result as _format_timestamp()
+        """
+        seconds, nanoseconds = divmod(timestamp_ns, 1_000_000_000)
+        if seconds != self._timestamp_second:
+            self._timestamp_second = seconds
+            self._timestamp_prefix = datetime.fromtimestamp(seconds).strftime('%Y-%m-%dT%H:%M:%S')
+        return f"{self._timestamp_prefix}.{nanoseconds // 1000:06d}"
+
+    def _write_buffer(self) -> None:
+        """Write all buffered records to the trace file (writer thread only)."""
+        if self._buffer_used:
+            with memoryview(self._buffer) as view:
+                self._write_all(view[:self._buffer_used])
+            self._buffer_used = 0
+        self._buffered_events = 0
+        self._last_flush = time.monotonic()
+
+    def _write_all(self, data: Union[bytes, memoryview]) -> None:
+        """
+        Write data to the trace file in full (writer thread only).
 
-    def _add_event(self, event_type: str, **kwargs) -> None:
+        Args:
+            data: Encoded records to append
+        """
+        # A write to a regular file can still be partial, so loop until done
+        remaining = memoryview(data)
+        try:
+            while remaining:
+                remaining = remaining[os.write(self._fd, remaining):]
+        except Exception as e:
+            logger.error(f"[TRACE] Failed to write trace file: {e}")
+        finally:
+            remaining.release()
+
+    def flush(self) -> None:
+        """Block until every event recorded so far has been written to the trace file."""
+        if self._finalized:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def _add_event(self, event_type: str, data: Dict[str, Any], full_result: Optional[str] = None) -> None:
         """
         Add an event to the trace.
 
+        The data dict is queued for the writer thread as is, so neither it nor
+        the values in it may be mutated afterwards.
+
         Args:
             event_type: Type of event (user_input, llm_request, tool_call, etc.)
-            **kwargs: Event-specific data
+            data: Event-specific fields
+            full_result: Untruncated tool result to store compressed, if any
         """
-        event: Dict[str, Any] = {
-            "timestamp": datetime.now().isoformat(),
-            "event_type": event_type,
-        }
-        event.update(kwargs)
+        if self._finalized:
+            logger.error(f"[TRACE] Event {event_type} recorded after session {self.session_id} was finalized")
+            return
 
-        self.trace["events"].append(event)
-        self._save()
+        # The timestamp is captured here as a plain integer so it reflects when
+        # the event happened; it is formatted to ISO 8601 on the writer thread
+        event = _TraceEvent(time.time_ns(), event_type, data, full_result)
+
+        if self._ring is not None:
+            self._ring.append(event)
+        self._queue.put(event)
 
         logger.debug(f"[TRACE] Event recorded: {event_type}")
 
@@ -101,10 +590,10 @@ class SessionTrace:
         Args:
             content: The user's message
         """
-        self._add_event(
-            event_type="user_input",
-            content=content
-        )
+        if "user_input" in self._skipped_types:
+            return
+
+        self._add_event("user_input", {"content": content})
 
     def log_llm_request(self, messages_count: int, tools: List[str]) -> None:
         """
@@ -114,11 +603,10 @@ class SessionTrace:
             messages_count: Number of messages in the conversation history
             tools: List of tools available to the LLM
         """
-        self._add_event(
-            event_type="llm_request",
-            messages_count=messages_count,
-            tools=tools
-        )
+        if "llm_request" in self._skipped_types:
+            return
+
+        self._add_event("llm_request", {"messages_count": messages_count, "tools": tools})
 
     def log_tool_call(self, tool_name: str, command: str, parameters: Dict[str, Any]) -> None:
         """
@@ -129,12 +617,10 @@ class SessionTrace:
             command: Command/operation being executed
             parameters: Parameters passed to the tool
         """
-        self._add_event(
-            event_type="tool_call",
-            tool_name=tool_name,
-            command=command,
-            parameters=parameters
-        )
+        if "tool_call" in self._skipped_types:
+            return
+
+        self._add_event("tool_call", {"tool_name": tool_name, "command": command, "parameters": parameters})
 
     def log_tool_result(self, tool_name: str, command: str, result: str, success: bool = True, error: Optional[str] = None) -> None:
         """
@@ -147,23 +633,29 @@ class SessionTrace:
             success: Whether the tool call succeeded
             error: Error message if tool call failed
         """
-        # Truncate very long results for readability
-        result_data = result
-        if len(result) > 1000:
-            result_data = result[:1000] + f"... (truncated, total length: {len(result)} chars)"
+        if "tool_result" in self._skipped_types:
+            return
+
+        # Keep only the head of very long results; result_length and truncated
+        # tell readers how much was cut
+        result_length = len(result)
+        truncated = result_length > TOOL_RESULT_MAX_LENGTH
 
         event_data = {
             "tool_name": tool_name,
             "command": command,
-            "result": result_data,
+            "result": result[:TOOL_RESULT_MAX_LENGTH] if truncated else result,
             "success": success,
-            "result_length": len(result)
+            "result_length": result_length,
+            "truncated": truncated
         }
 
         if error:
             event_data["error"] = error
 
-        self._add_event(event_type="tool_result", **event_data)
+        # The full result is compressed on the writer thread, off the chat loop
+        full_result = result if truncated and self._compressor is not None else None
+        self._add_event("tool_result", event_data, full_result)
 
     def log_llm_response(self, content: str) -> None:
         """
@@ -172,10 +664,10 @@ class SessionTrace:
         Args:
             content: The LLM's response to the user
         """
-        self._add_event(
-            event_type="llm_response",
-            content=content
-        )
+        if "llm_response" in self._skipped_types:
+            return
+
+        self._add_event("llm_response", {"content": content})
 
     def log_token_usage(
         self,
@@ -201,21 +693,23 @@ class SessionTrace:
             total_cache_read_tokens: Cumulative cache read tokens for session
             total_cache_write_tokens: Cumulative cache write tokens for session
         """
-        self._add_event(
-            event_type="token_usage",
-            last_request={
+        if "token_usage" in self._skipped_types:
+            return
+
+        self._add_event("token_usage", {
+            "last_request": {
                 "input_tokens": input_tokens,
                 "output_tokens": output_tokens,
                 "cache_read_tokens": cache_read_tokens,
                 "cache_write_tokens": cache_write_tokens
             },
-            cumulative={
+            "cumulative": {
                 "total_input_tokens": total_input_tokens,
                 "total_output_tokens": total_output_tokens,
                 "total_cache_read_tokens": total_cache_read_tokens,
                 "total_cache_write_tokens": total_cache_write_tokens
             }
-        )
+        })
 
     def log_error(self, error_type: str, message: str, traceback: Optional[str] = None) -> None:
         """
@@ -226,6 +720,9 @@ class SessionTrace:
             message: Error message
             traceback: Optional traceback information
         """
+        if "error" in self._skipped_types:
+            return
+
         event_data = {
             "error_type": error_type,
             "message": message
@@ -234,17 +731,92 @@ class SessionTrace:
         if traceback:
             event_data["traceback"] = traceback
 
-        self._add_event(event_type="error", **event_data)
+        self._add_event("error", event_data)
+
+        # Errors often precede a crash, so do not leave them in the buffer
+        self.flush()
+
+    def dump_ring(self) -> List[Dict[str, Any]]:
+        """
+        Snapshot the most recent events, e.g. for inspection after an error.
+
+        Returns:
+            Up to ring_size of the latest events, oldest first (empty if the
+            ring is disabled)
+        """
+        if self._ring is None:
+            return []
+        # Full tool results are compressed by the writer, so let it catch up
+        self.flush()
+        return [event.to_record(_format_timestamp(event.timestamp_ns)) for event in self._ring]
 
     def finalize(self) -> str:
         """
         Finalize the session trace.
 
+        Waits for all queued events and the footer line to be written, then closes
+        the trace file. Calling it again is a no-op.
+
         Returns:
             Path to the trace file
         """
-        self.trace["end_time"] = datetime.now().isoformat()
-        self._save()
-
-        logger.info(f"[TRACE] Session finalized: {self.session_id}")
+        if not self._finalized:
+            self._finalized = True
+            self.trace["end_time"] = _format_timestamp(time.time_ns())
+            self.trace["duration_ns"] = time.monotonic_ns() - self._start_monotonic_ns
+            self._queue.put({
+                "type": "footer",
+                "end_time": self.trace["end_time"],
+                "duration_ns": self.trace["duration_ns"]
+            })
+
+            # Let the writer drain everything queued, then stop it
+            self._queue.put(None)
+            self._writer.join()
+            try:
+                # The session record is complete, so make sure it survives a power loss
+                os.fsync(self._fd)
+            except OSError as e:
+                logger.error(f"[TRACE] Failed to sync trace file: {e}")
+            finally:
+                os.close(self._fd)
+            _open_traces.discard(self)
+
+            logger.info(f"[TRACE] Session finalized: {self.session_id}")
         return str(self.trace_file)
+
+
+def main() -> int:
+    """Print a session trace as an indented JSON document, or export it to a file."""
+    parser = argparse.ArgumentParser(
+        description='Pretty-print a session trace as a single indented JSON document'
+    )
+    parser.add_argument('trace_file', type=Path, help='Path to session trace .jsonl file')
+    parser.add_argument(
+        '-o', '--output',
+        type=Path,
+        help='Write a compact single-document .json file here instead of printing'
+    )
+    args = parser.parse_args()
+
+    if not args.trace_file.exists():
+        print(f"Error: Trace file not found: {args.trace_file}", file=sys.stderr)
+        return 1
+
+    try:
+        if args.output:
+            export_trace_json(args.trace_file, args.output)
+            print(f"Trace exported to: {args.output}")
+            return 0
+        trace = load_trace(args.trace_file)
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in trace file: {e}", file=sys.stderr)
+        return 1
+
+    json.dump(trace, sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())